@@ -35,31 +35,18 @@ async def process_files():
                     logger.info(f"File processed successfully. Metadata: {file_metadata}")
                     logger.info(f"Generated {len(chunks)} text chunks")
                     
-                    # Store file metadata
-                    file_id = db_service.store_file_metadata(file_metadata)
-                    logger.info(f"Stored file metadata with ID: {file_id}")
+                    # Skip files that were already ingested
+                    if db_service.get_file_by_checksum(file_metadata.checksum):
+                        logger.info(f"Skipping already processed file: {file_path}")
+                        continue
                     
-                    # Process each chunk
-                    for chunk in chunks:
-                        try:
-                            # Update chunk with file_id
-                            chunk.file_id = file_id
-                            
-                            # Store text chunk
-                            chunk_id = await db_service.store_text_chunk(chunk)
-                            logger.info(f"Stored text chunk with ID: {chunk_id}")
-                            
-                            # Generate embedding
-                            embedding = embed_service.get_embedding(chunk.chunk_text)
-                            logger.info(f"Generated embedding for chunk {chunk_id}")
-                            
-                            # Store embedding
-                            await db_service.store_embedding(chunk_id, embedding)
-                            logger.info(f"Stored embedding for chunk {chunk_id}")
-                            
-                        except Exception as e:
-                            logger.error(f"Error processing chunk: {str(e)}", exc_info=True)
-                            continue
+                    # Generate embeddings for all chunks
+                    embeddings = embed_service.get_embeddings_batch([chunk.chunk_text for chunk in chunks])
+                    logger.info(f"Generated {len(embeddings)} embeddings")
+                    
+                    # Store metadata, chunks and embeddings atomically
+                    file_id = await db_service.ingest_file(file_metadata, chunks, embeddings)
+                    logger.info(f"Ingested file with ID: {file_id}")
                     
                 except Exception as e:
                     logger.error(f"Error processing file {file_path}: {str(e)}", exc_info=True)
@@ -79,7 +66,7 @@ async def list_files():
     """List all processed files"""
     try:
         logger.info("Fetching list of processed files")
-        result = db_service.supabase.table("files").select("*").execute()
+        result = db_service.supabase.table("files").select("*").eq("status", "complete").execute()
         logger.info(f"Found {len(result.data)} files")
         return result.data
     except Exception as e:
@@ -18,6 +18,9 @@ class Settings(BaseSettings):
     folder_path: Path = Path(os.getenv("FOLDER_PATH", "./folder"))
     chunk_size: int = 10000
     chunk_overlap: int = 200
+
+    # Number of chunks sent per ingest_file RPC payload
+    ingest_batch_size: int = int(os.getenv("INGEST_BATCH_SIZE", "50"))
     
     class Config:
         env_file = ".env"
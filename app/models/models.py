@@ -14,7 +14,7 @@ class FileMetadata(BaseModel):
 
 class TextChunk(BaseModel):
     id: Optional[str] = None
-    file_id: str
+    file_id: Optional[str] = None
     chunk_text: str
     chunk_index: int
     created_at: datetime
@@ -18,58 +18,78 @@ class DatabaseService:
             logger.error(f"Failed to initialize Supabase client: {str(e)}", exc_info=True)
             raise
     
-    def store_file_metadata(self, file_metadata: FileMetadata) -> str:
-        """Store file metadata and return the file ID"""
-        logger.info(f"Storing file metadata: {file_metadata}")
-        try:
-            data = {
-                "filename": file_metadata.filename,
-                "file_path": file_metadata.file_path,
-                "file_type": file_metadata.file_type,
-                "file_size": file_metadata.file_size,
-                "checksum": file_metadata.checksum,
-                "created_at": file_metadata.created_at.isoformat(),
-                "updated_at": file_metadata.updated_at.isoformat()
-            }
-            result = self.supabase.table("files").insert(data).execute()
-            logger.info(f"File metadata stored successfully: {result.data}")
-            return result.data[0]["id"]
-        except Exception as e:
-            logger.error(f"Error storing file metadata: {str(e)}", exc_info=True)
-            raise
+    def _file_metadata_payload(self, file_metadata: FileMetadata) -> dict:
+        """Map file metadata to the column values of the files table"""
+        return {
+            "filename": file_metadata.filename,
+            "file_path": file_metadata.file_path,
+            "file_type": file_metadata.file_type,
+            "file_size": file_metadata.file_size,
+            "checksum": file_metadata.checksum,
+            "created_at": file_metadata.created_at.isoformat(),
+            "updated_at": file_metadata.updated_at.isoformat()
+        }
     
-    async def store_text_chunk(self, chunk: TextChunk) -> str:
-        """Store a text chunk in the database"""
-        logger.info(f"Storing text chunk for file_id: {chunk.file_id}")
-        try:
-            data = {
-                "file_id": chunk.file_id,
+    async def ingest_file(self, file_metadata: FileMetadata, chunks: List[TextChunk], embeddings: List[List[float]]) -> str:
+        """Store a file with its chunks and embeddings via the ingest_file RPC.
+
+        Files with more chunks than settings.ingest_batch_size are streamed as
+        several payloads. The file row stays in status 'ingesting' until the
+        last payload's transaction marks it 'complete', so an interrupted
+        ingest is never treated as processed and can be retried.
+        """
+        logger.info(f"Ingesting file {file_metadata.filename} with {len(chunks)} chunks")
+        if len(chunks) != len(embeddings):
+            raise ValueError(f"Got {len(chunks)} chunks but {len(embeddings)} embeddings")
+
+        file_data = self._file_metadata_payload(file_metadata)
+        chunk_data = [
+            {
                 "chunk_text": chunk.chunk_text,
                 "chunk_index": chunk.chunk_index,
-                "created_at": chunk.created_at.isoformat()
+                "created_at": chunk.created_at.isoformat(),
+                "embedding": embedding
             }
-            result = self.supabase.table("text_chunks").insert(data).execute()
-            logger.info("Text chunk stored successfully")
-            return result.data[0]["id"]
+            for chunk, embedding in zip(chunks, embeddings)
+        ]
+
+        batch_size = max(1, settings.ingest_batch_size)
+        file_id = None
+        try:
+            # Always make at least one call so files without chunks still get a row
+            for start in range(0, max(len(chunk_data), 1), batch_size):
+                batch = chunk_data[start:start + batch_size]
+                result = self.supabase.rpc(
+                    "ingest_file",
+                    {
+                        "p_file": file_data,
+                        "p_chunks": batch,
+                        "p_file_id": file_id,
+                        "p_final": start + batch_size >= len(chunk_data)
+                    }
+                ).execute()
+                file_id = result.data
+                logger.info(f"Ingested batch of {len(batch)} chunks for file ID: {file_id}")
+            return file_id
         except Exception as e:
-            logger.error(f"Error storing text chunk: {str(e)}", exc_info=True)
+            logger.error(f"Error ingesting file: {str(e)}", exc_info=True)
+            # The incomplete row is already hidden from lookups and search and
+            # is replaced by a later ingest; deleting it here just frees space early
+            if file_id is not None:
+                try:
+                    self.delete_incomplete_file(file_id)
+                except Exception as cleanup_error:
+                    logger.error(f"Could not delete incomplete file {file_id}: {str(cleanup_error)}", exc_info=True)
             raise
     
-    async def store_embedding(self, chunk_id: int, embedding: List[float]) -> None:
-        """Store an embedding in the database"""
-        logger.info(f"Storing embedding for chunk {chunk_id}")
+    def delete_incomplete_file(self, file_id: str) -> None:
+        """Delete a file that is not fully ingested; its chunks and embeddings are removed by cascade"""
+        logger.info(f"Deleting incomplete file with ID: {file_id}")
         try:
-            logger.info("Generating embedding...")
-            embedding_data = {
-                "chunk_id": chunk_id,
-                "embedding": embedding
-            }
-            logger.info(f"Embedding data prepared: {embedding_data}")
-            
-            result = self.supabase.table("embeddings").insert(embedding_data).execute()
-            logger.info(f"Embedding stored successfully: {result}")
+            self.supabase.table("files").delete().eq("id", file_id).neq("status", "complete").execute()
+            logger.info(f"Deleted incomplete file {file_id}")
         except Exception as e:
-            logger.error(f"Error storing embedding: {str(e)}", exc_info=True)
+            logger.error(f"Error deleting incomplete file: {str(e)}", exc_info=True)
             raise
     
     async def search_similar(self, query: str, limit: int = 5) -> List[Dict]:
@@ -101,10 +121,10 @@ class DatabaseService:
             raise
     
     def get_file_by_checksum(self, checksum: str) -> Optional[dict]:
-        """Get file metadata by checksum"""
+        """Get metadata of a fully ingested file by checksum"""
         logger.info(f"Looking up file by checksum: {checksum}")
         try:
-            result = self.supabase.table("files").select("*").eq("checksum", checksum).execute()
+            result = self.supabase.table("files").select("*").eq("checksum", checksum).eq("status", "complete").execute()
             logger.info(f"File lookup result: {result.data}")
             return result.data[0] if result.data else None
         except Exception as e:
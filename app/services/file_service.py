@@ -90,7 +90,6 @@ class FileService:
                     chunk_text = " ".join(current_chunk)
                     logger.info(f"Created chunk {len(chunks)} with {len(chunk_text)} characters")
                     chunks.append(TextChunk(
-                        file_id="",  # Will be set after file metadata is stored
                         chunk_text=chunk_text,
                         chunk_index=len(chunks),
                         created_at=now
@@ -107,7 +106,6 @@ class FileService:
                 chunk_text = " ".join(current_chunk)
                 logger.info(f"Created final chunk {len(chunks)} with {len(chunk_text)} characters")
                 chunks.append(TextChunk(
-                    file_id="",  # Will be set after file metadata is stored
                     chunk_text=chunk_text,
                     chunk_index=len(chunks),
                     created_at=now
@@ -152,7 +150,6 @@ class FileService:
             text_chunks = []
             for i, chunk in enumerate(chunks):
                 text_chunks.append(TextChunk(
-                    file_id="",  # Will be set after file metadata is stored
                     chunk_text=chunk.chunk_text,  # Use the chunk_text from the TextChunk object
                     chunk_index=i,
                     created_at=now
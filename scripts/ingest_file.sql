@@ -0,0 +1,105 @@
+-- Schema changes and the ingest_file function used by DatabaseService.ingest_file.
+-- Safe to run more than once, on a fresh database or on one that already holds files.
+
+-- Track ingest progress; rows that existed before this migration are complete
+ALTER TABLE files ADD COLUMN IF NOT EXISTS status text NOT NULL DEFAULT 'complete';
+ALTER TABLE files ALTER COLUMN status SET DEFAULT 'ingesting';
+ALTER TABLE files ADD COLUMN IF NOT EXISTS status_updated_at timestamptz NOT NULL DEFAULT now();
+
+-- Remove duplicate checksums, keeping the earliest row, before enforcing uniqueness
+DELETE FROM files f
+USING files d
+WHERE f.checksum = d.checksum
+  AND (f.created_at, f.id::text) > (d.created_at, d.id::text);
+
+CREATE UNIQUE INDEX IF NOT EXISTS files_checksum_key ON files (checksum);
+
+-- Store a file's chunks and embeddings in one transaction per call.
+--
+-- When p_file_id is null a new file row is created with status 'ingesting'.
+-- If a row with the same checksum exists it is only replaced when it is
+-- incomplete and has not progressed for 30 minutes; a complete row or one
+-- that another run is still streaming raises an error instead.
+-- When p_file_id is set the chunks are appended to that file, which must
+-- still be 'ingesting'. The call with p_final set marks the file 'complete',
+-- so a file streamed over several calls only becomes visible once all of
+-- its chunks are in.
+CREATE OR REPLACE FUNCTION ingest_file(
+    p_file jsonb,
+    p_chunks jsonb,
+    p_file_id uuid DEFAULT NULL,
+    p_final boolean DEFAULT true
+)
+RETURNS uuid
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_file_id uuid := p_file_id;
+    v_existing record;
+BEGIN
+    IF v_file_id IS NULL THEN
+        SELECT id, status, status_updated_at INTO v_existing
+        FROM files
+        WHERE checksum = p_file->>'checksum'
+        FOR UPDATE;
+
+        IF FOUND THEN
+            IF v_existing.status = 'complete' THEN
+                RAISE EXCEPTION 'File with checksum % is already ingested', p_file->>'checksum';
+            ELSIF v_existing.status_updated_at > now() - interval '30 minutes' THEN
+                RAISE EXCEPTION 'File with checksum % is being ingested by another run', p_file->>'checksum';
+            END IF;
+            DELETE FROM files WHERE id = v_existing.id;
+        END IF;
+
+        INSERT INTO files (filename, file_path, file_type, file_size, checksum, status, created_at, updated_at)
+        VALUES (
+            p_file->>'filename',
+            p_file->>'file_path',
+            p_file->>'file_type',
+            (p_file->>'file_size')::integer,
+            p_file->>'checksum',
+            'ingesting',
+            (p_file->>'created_at')::timestamp,
+            (p_file->>'updated_at')::timestamp
+        )
+        ON CONFLICT (checksum) DO NOTHING
+        RETURNING id INTO v_file_id;
+
+        IF v_file_id IS NULL THEN
+            RAISE EXCEPTION 'File with checksum % is being ingested by another run', p_file->>'checksum';
+        END IF;
+    ELSE
+        PERFORM 1 FROM files WHERE id = v_file_id AND status = 'ingesting' FOR UPDATE;
+        IF NOT FOUND THEN
+            RAISE EXCEPTION 'File % is not being ingested', v_file_id;
+        END IF;
+    END IF;
+
+    WITH payload AS (
+        SELECT
+            c->>'chunk_text' AS chunk_text,
+            (c->>'chunk_index')::integer AS chunk_index,
+            (c->>'created_at')::timestamp AS created_at,
+            (c->>'embedding')::vector(1536) AS embedding
+        FROM jsonb_array_elements(p_chunks) AS c
+    ),
+    inserted AS (
+        INSERT INTO text_chunks (file_id, chunk_text, chunk_index, created_at)
+        SELECT v_file_id, payload.chunk_text, payload.chunk_index, payload.created_at
+        FROM payload
+        RETURNING id, chunk_index
+    )
+    INSERT INTO embeddings (chunk_id, embedding, created_at)
+    SELECT inserted.id, payload.embedding, payload.created_at
+    FROM inserted
+    JOIN payload ON payload.chunk_index = inserted.chunk_index;
+
+    UPDATE files
+    SET status = CASE WHEN p_final THEN 'complete' ELSE 'ingesting' END,
+        status_updated_at = now()
+    WHERE id = v_file_id;
+
+    RETURN v_file_id;
+END;
+$$;
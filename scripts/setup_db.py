@@ -1,6 +1,7 @@
 from supabase import create_client
 from app.config import settings
 import os
+from pathlib import Path
 
 def setup_database():
     # Initialize Supabase client
@@ -24,9 +25,9 @@ def setup_database():
         ]
     }).execute()
     
-    # Create chunks table
+    # Create text chunks table
     supabase.rpc('create_table', {
-        'table_name': 'chunks',
+        'table_name': 'text_chunks',
         'columns': [
             {'name': 'id', 'type': 'uuid', 'primary_key': True},
             {'name': 'file_id', 'type': 'uuid', 'not_null': True},
@@ -49,10 +50,16 @@ def setup_database():
             {'name': 'created_at', 'type': 'timestamp', 'not_null': True}
         ],
         'foreign_keys': [
-            {'column': 'chunk_id', 'references': 'chunks(id)', 'on_delete': 'CASCADE'}
+            {'column': 'chunk_id', 'references': 'text_chunks(id)', 'on_delete': 'CASCADE'}
         ]
     }).execute()
     
+    # Add ingest status tracking and the ingest_file function. This is plain
+    # SQL run through the exec_sql helper (see README) and is safe to re-run
+    # against an existing database.
+    sql = (Path(__file__).parent / 'ingest_file.sql').read_text()
+    supabase.rpc('exec_sql', {'query': sql}).execute()
+    
     # Create function for similarity search
     supabase.rpc('create_function', {
         'function_name': 'match_chunks',
@@ -68,9 +75,10 @@ def setup_database():
                 f.filename,
                 1 - (e.embedding <=> query_embedding) as similarity
             FROM embeddings e
-            JOIN chunks c ON c.id = e.chunk_id
+            JOIN text_chunks c ON c.id = e.chunk_id
             JOIN files f ON f.id = c.file_id
-            WHERE 1 - (e.embedding <=> query_embedding) > match_threshold
+            WHERE f.status = 'complete'
+              AND 1 - (e.embedding <=> query_embedding) > match_threshold
             ORDER BY similarity DESC
             LIMIT match_count;
         '''
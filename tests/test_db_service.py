@@ -0,0 +1,131 @@
+import asyncio
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.models.models import FileMetadata, TextChunk
+from app.services.db_service import DatabaseService
+
+
+FILE_ID = "11111111-1111-1111-1111-111111111111"
+
+
+def make_service(rpc_results):
+    """Build a DatabaseService whose rpc().execute() returns or raises rpc_results in order"""
+    with patch("app.services.db_service.create_client") as create_client:
+        service = DatabaseService()
+    supabase = create_client.return_value
+    responses = []
+    for result in rpc_results:
+        response = MagicMock()
+        if isinstance(result, Exception):
+            response.execute.side_effect = result
+        else:
+            response.execute.return_value = MagicMock(data=result)
+        responses.append(response)
+    supabase.rpc.side_effect = responses
+    return service, supabase
+
+
+def make_file(chunk_count):
+    now = datetime(2024, 1, 1)
+    file_metadata = FileMetadata(
+        filename="doc.txt",
+        file_path="folder/doc.txt",
+        file_type="text/plain",
+        file_size=123,
+        checksum="abc",
+        created_at=now,
+        updated_at=now
+    )
+    chunks = [
+        TextChunk(chunk_text=f"chunk {i}", chunk_index=i, created_at=now)
+        for i in range(chunk_count)
+    ]
+    embeddings = [[float(i)] * 3 for i in range(chunk_count)]
+    return file_metadata, chunks, embeddings
+
+
+def rpc_payloads(supabase):
+    return [call.args[1] for call in supabase.rpc.call_args_list]
+
+
+@pytest.fixture(autouse=True)
+def batch_size():
+    with patch("app.services.db_service.settings.ingest_batch_size", 2):
+        yield
+
+
+def test_ingest_file_single_batch_is_final():
+    service, supabase = make_service([FILE_ID])
+    file_metadata, chunks, embeddings = make_file(2)
+
+    file_id = asyncio.run(service.ingest_file(file_metadata, chunks, embeddings))
+
+    assert file_id == FILE_ID
+    payloads = rpc_payloads(supabase)
+    assert len(payloads) == 1
+    assert supabase.rpc.call_args.args[0] == "ingest_file"
+    assert payloads[0]["p_file_id"] is None
+    assert payloads[0]["p_final"] is True
+    assert payloads[0]["p_file"]["checksum"] == "abc"
+    assert [c["chunk_index"] for c in payloads[0]["p_chunks"]] == [0, 1]
+    assert payloads[0]["p_chunks"][1]["embedding"] == [1.0, 1.0, 1.0]
+
+
+def test_ingest_file_splits_into_batches_and_passes_file_id():
+    service, supabase = make_service([FILE_ID, FILE_ID, FILE_ID])
+    file_metadata, chunks, embeddings = make_file(5)
+
+    asyncio.run(service.ingest_file(file_metadata, chunks, embeddings))
+
+    payloads = rpc_payloads(supabase)
+    assert [len(p["p_chunks"]) for p in payloads] == [2, 2, 1]
+    assert [p["p_file_id"] for p in payloads] == [None, FILE_ID, FILE_ID]
+    assert [p["p_final"] for p in payloads] == [False, False, True]
+
+
+def test_ingest_file_without_chunks_still_creates_file():
+    service, supabase = make_service([FILE_ID])
+    file_metadata, chunks, embeddings = make_file(0)
+
+    asyncio.run(service.ingest_file(file_metadata, chunks, embeddings))
+
+    payloads = rpc_payloads(supabase)
+    assert len(payloads) == 1
+    assert payloads[0]["p_chunks"] == []
+    assert payloads[0]["p_final"] is True
+
+
+def test_ingest_file_rejects_mismatched_embeddings():
+    service, supabase = make_service([])
+    file_metadata, chunks, embeddings = make_file(3)
+
+    with pytest.raises(ValueError):
+        asyncio.run(service.ingest_file(file_metadata, chunks, embeddings[:2]))
+
+    supabase.rpc.assert_not_called()
+
+
+def test_ingest_file_deletes_incomplete_file_on_mid_stream_failure():
+    service, supabase = make_service([FILE_ID, RuntimeError("connection lost")])
+    file_metadata, chunks, embeddings = make_file(4)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(service.ingest_file(file_metadata, chunks, embeddings))
+
+    supabase.table.assert_called_once_with("files")
+    delete = supabase.table.return_value.delete.return_value
+    delete.eq.assert_called_once_with("id", FILE_ID)
+    delete.eq.return_value.neq.assert_called_once_with("status", "complete")
+
+
+def test_ingest_file_first_batch_failure_skips_cleanup():
+    service, supabase = make_service([RuntimeError("already ingested")])
+    file_metadata, chunks, embeddings = make_file(1)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(service.ingest_file(file_metadata, chunks, embeddings))
+
+    supabase.table.assert_not_called()